@@ -1,4 +1,4 @@
-from typing import Any, Union, cast
+from typing import Any, Dict, List, Union, cast
 from boa3.builtin import NeoMetadata, metadata, public
 from boa3.builtin.contract import Nep17TransferEvent, abort
 from boa3.builtin.interop.blockchain import get_contract, Transaction
@@ -30,15 +30,9 @@ def manifest_metadata() -> NeoMetadata:
 
 
 OWNER = UInt160(b'\x80\xcf\xb2\\\x83z\xa4k\xd8\xfd\x14Q\xf1w9\xd2qjY\xb4')
-TOKEN_DECIMALS = 8
-TOKEN_SYMBOL = 'TOKEN'
 TOTAL_SUPPLY = b'total_supply'
 CONTINUE_MINTING = b'continue_minting'
 
-HOLDERS = {
-    UInt160(b'\x80\xcf\xb2\\\x83z\xa4k\xd8\xfd\x14Q\xf1w9\xd2qjY\xb4'): 1000000000000,
-}
-
 
 # ---------------------------------
 # EVENTS
@@ -57,7 +51,7 @@ def symbol() -> str:
     Gets the symbols of the token.
     :return: a short string representing symbol of the token managed in this contract.
     """
-    return TOKEN_SYMBOL
+    return 'TOKEN'
 
 @public
 def decimals() -> int:
@@ -65,7 +59,7 @@ def decimals() -> int:
     Gets the amount of decimals used by the token.
     :return: the number of decimals used by the token.
     """
-    return TOKEN_DECIMALS
+    return 8
 
 
 @public
@@ -88,6 +82,21 @@ def balanceOf(account: UInt160) -> int:
     return get(account).to_int()
 
 
+@public
+def balanceOfBatch(accounts: List[UInt160]) -> List[int]:
+    """
+    Get the current balances of several addresses
+    :param accounts: the account addresses to retrieve the balances for
+    :type accounts: List[UInt160]
+    :return: the balances, in the same order as the accounts
+    """
+    result: List[int] = []
+    for i in range(len(accounts)):
+        assert len(accounts[i]) == 20
+        result.append(get(accounts[i]).to_int())
+    return result
+
+
 @public
 def transfer(from_address: UInt160, to_address: UInt160, amount: int, data: Any) -> bool:
     """
@@ -106,31 +115,37 @@ def transfer(from_address: UInt160, to_address: UInt160, amount: int, data: Any)
     :raise AssertionError: raised if `from_address` or `to_address` length is not 20 or if `amount` is less than zero.
     """
     # the parameters from and to should be 20-byte addresses. If not, this method should throw an exception.
+    # The declared parameter types are never enforced at runtime, and balances share the storage with TOTAL_SUPPLY
+    # and CONTINUE_MINTING, so a shorter key could overwrite them.
     assert len(from_address) == 20 and len(to_address) == 20
     # the parameter amount must be greater than or equal to 0. If not, this method should throw an exception.
     assert amount >= 0
-
-    # The function MUST return false if the from account balance does not have enough tokens to spend.
-    from_balance = get(from_address).to_int()
-    if from_balance < amount:
-        return False
+    caller = calling_script_hash
 
     # The function should check whether the from address equals the caller contract hash.
     # If so, the transfer should be processed;
     # If not, the function should use the check_witness to verify the transfer.
-    if from_address != calling_script_hash:
+    if from_address != caller:
         if not check_witness(from_address):
             return False
 
-    # skip balance changes if transferring to yourself or transferring 0 cryptocurrency
-    if from_address != to_address and amount != 0:
-        if from_balance == amount:
-            delete(from_address)
-        else:
-            put(from_address, from_balance - amount)
+    # skip the storage entirely if transferring 0 cryptocurrency
+    if amount != 0:
+        # The function MUST return false if the from account balance does not have enough tokens to spend.
+        from_balance = get(from_address).to_int()
+        if from_balance < amount:
+            return False
 
-        to_balance = get(to_address).to_int()
-        put(to_address, to_balance + amount)
+        # skip balance changes if transferring to yourself
+        if from_address != to_address:
+            new_from_balance = from_balance - amount
+            if new_from_balance == 0:
+                delete(from_address)
+            else:
+                put(from_address, new_from_balance)
+
+            to_balance = get(to_address).to_int()
+            put(to_address, to_balance + amount)
 
     # if the method succeeds, it must fire the transfer event
     on_transfer(from_address, to_address, amount)
@@ -140,6 +155,75 @@ def transfer(from_address: UInt160, to_address: UInt160, amount: int, data: Any)
     return True
 
 
+@public
+def transferBatch(from_address: UInt160, to_addresses: List[UInt160], amounts: List[int], data: Any) -> bool:
+    """
+    Transfers NEP17 tokens from one account to several accounts in a single invocation
+    The witness is checked once for the whole batch and a `Transfer` event is fired for every recipient.
+    :param from_address: the address to transfer from
+    :type from_address: UInt160
+    :param to_addresses: the addresses to transfer to
+    :type to_addresses: List[UInt160]
+    :param amounts: the amount of NEP17 tokens to transfer to each address
+    :type amounts: List[int]
+    :param data: whatever data is pertinent to the onPayment method
+    :type data: Any
+    :return: whether the transfer was successful
+    :raise AssertionError: raised if any address length is not 20, if the lists lengths differ or if any amount is
+    less than zero.
+    """
+    assert len(from_address) == 20
+    assert len(to_addresses) == len(amounts)
+    caller = calling_script_hash
+
+    if from_address != caller:
+        if not check_witness(from_address):
+            return False
+
+    # validate the whole batch before writing to the storage
+    # credits are summed per recipient, so repeated recipients are read and written once
+    from_balance = get(from_address).to_int()
+    total_amount = 0
+    credits: Dict[UInt160, int] = {}
+    for i in range(len(to_addresses)):
+        to_address = to_addresses[i]
+        amount = amounts[i]
+        assert len(to_address) == 20
+        assert amount >= 0
+        if to_address == from_address:
+            # self transfers are checked against what is left after the debits before them
+            if from_balance - total_amount < amount:
+                return False
+        # skip balance changes if transferring to yourself or transferring 0 cryptocurrency
+        elif amount != 0:
+            total_amount += amount
+            if to_address in credits:
+                credits[to_address] = credits[to_address] + amount
+            else:
+                credits[to_address] = amount
+
+    if from_balance < total_amount:
+        return False
+
+    # the sender balance is written once for the whole batch
+    if total_amount != 0:
+        new_from_balance = from_balance - total_amount
+        if new_from_balance == 0:
+            delete(from_address)
+        else:
+            put(from_address, new_from_balance)
+
+    for to_address in credits.keys():
+        to_balance = get(to_address).to_int()
+        put(to_address, to_balance + credits[to_address])
+
+    for i in range(len(to_addresses)):
+        on_transfer(from_address, to_addresses[i], amounts[i])
+        post_transfer(from_address, to_addresses[i], amounts[i], data)
+
+    return True
+
+
 def post_transfer(from_address: Union[UInt160, None], to_address: Union[UInt160, None], amount: int, data: Any):
     """
     Checks if the one receiving NEP17 tokens is a smart contract and if it's one the onPayment method will be called
@@ -152,19 +236,45 @@ def post_transfer(from_address: Union[UInt160, None], to_address: Union[UInt160,
     :param data: any pertinent data that might validate the transaction
     :type data: Any
     """
-    if not isinstance(to_address, None):
+    if to_address is not None:
+        # the lookup is not cached in storage: a contract can be deployed later at an address that already holds
+        # tokens, and a storage write costs more than the lookup it would save
         contract = get_contract(to_address)
-        if not isinstance(contract, None):
+        if contract is not None:
             call_contract(to_address, 'onNEP17Payment', [from_address, amount, data])
 
 
+def _post_mint(to_address: UInt160, amount: int):
+    """
+    Calls the onPayment method if the account receiving minted tokens is a smart contract
+    :param to_address: the address of the receiver
+    :type to_address: UInt160
+    :param amount: the amount of tokens minted
+    :type amount: int
+    """
+    contract = get_contract(to_address)
+    if contract is not None:
+        call_contract(to_address, 'onNEP17Payment', [None, amount, None])
+
+
+def _mint_no_supply_update(account: UInt160, amount: int):
+    """
+    Adds minted tokens to an account balance, leaving the total supply to be updated by the caller
+    :param account: the address of the account receiving the tokens
+    :type account: UInt160
+    :param amount: the amount of tokens minted
+    :type amount: int
+    """
+    put(account, get(account).to_int() + amount)
+
+
 @public
 def finishMinting() -> bool:
-    continue_minting = get(CONTINUE_MINTING).to_bool()
-    if not continue_minting:
+    # minting is enabled while the CONTINUE_MINTING key is present
+    if len(get(CONTINUE_MINTING)) == 0:
         return False
 
-    put(CONTINUE_MINTING, False)
+    delete(CONTINUE_MINTING)
     return True
 
 
@@ -178,17 +288,53 @@ def mint(account: UInt160, amount: int):
     :type amount: int
     :raise AssertionError: raised if amount is less than than 0
     """
-    continue_minting = get(CONTINUE_MINTING).to_bool()
-    assert amount >= 0 and check_witness(OWNER) and continue_minting
+    assert len(account) == 20
+    assert amount >= 0
+    assert check_witness(OWNER)
+    # the storage is only read once the cheaper checks have passed
+    assert len(get(CONTINUE_MINTING)) > 0
     if amount != 0:
-        current_total_supply = totalSupply()
-        account_balance = balanceOf(account)
-
+        current_total_supply = get(TOTAL_SUPPLY).to_int()
         put(TOTAL_SUPPLY, current_total_supply + amount)
-        put(account, account_balance + amount)
+        _mint_no_supply_update(account, amount)
 
         on_transfer(None, account, amount)
-        post_transfer(None, account, amount, None)
+        _post_mint(account, amount)
+
+
+@public
+def mintBatch(accounts: List[UInt160], amounts: List[int]):
+    """
+    Mints new tokens to several accounts in a single invocation.
+    :param accounts: the addresses of the accounts receiving the tokens
+    :type accounts: List[UInt160]
+    :param amounts: the amount of tokens minted to each account
+    :type amounts: List[int]
+    :raise AssertionError: raised if the lists lengths differ or if any amount is less than than 0
+    """
+    assert len(accounts) == len(amounts)
+    total_amount = 0
+    for i in range(len(accounts)):
+        assert len(accounts[i]) == 20
+        assert amounts[i] >= 0
+        total_amount += amounts[i]
+
+    assert check_witness(OWNER)
+    # the storage is only read once the cheaper checks have passed
+    assert len(get(CONTINUE_MINTING)) > 0
+
+    if total_amount != 0:
+        put(TOTAL_SUPPLY, get(TOTAL_SUPPLY).to_int() + total_amount)
+
+    # every balance is written before any onPayment callback runs
+    for i in range(len(accounts)):
+        if amounts[i] != 0:
+            _mint_no_supply_update(accounts[i], amounts[i])
+
+    for i in range(len(accounts)):
+        if amounts[i] != 0:
+            on_transfer(None, accounts[i], amounts[i])
+            _post_mint(accounts[i], amounts[i])
 
 
 @public
@@ -203,33 +349,28 @@ def burn(amount: int):
     if amount != 0:
         tx = cast(Transaction, script_container)
         account = tx.sender
-        account_balance = balanceOf(account)
+        account_balance = get(account).to_int()
         assert account_balance >= amount
 
-        current_total_supply = totalSupply()
+        current_total_supply = get(TOTAL_SUPPLY).to_int()
         put(TOTAL_SUPPLY, current_total_supply - amount)
 
-        if account_balance == amount:
+        new_account_balance = account_balance - amount
+        if new_account_balance == 0:
             delete(account)
         else:
-            put(account, account_balance - amount)
+            put(account, new_account_balance)
 
         on_transfer(account, None, amount)
-        post_transfer(account, None, amount, None)
 
 
 @public
 def _deploy(data: Any, update: bool):
-    total_supply = 0
-
-    for holder in HOLDERS.keys():
-        amount = HOLDERS[holder]
-        put(holder, amount)
-        on_transfer(None, holder, amount)
-        total_supply += amount
+    put(UInt160(b'\x80\xcf\xb2\\\x83z\xa4k\xd8\xfd\x14Q\xf1w9\xd2qjY\xb4'), 1000000000000)
+    on_transfer(None, UInt160(b'\x80\xcf\xb2\\\x83z\xa4k\xd8\xfd\x14Q\xf1w9\xd2qjY\xb4'), 1000000000000)
 
-    put(CONTINUE_MINTING, True)
-    put(TOTAL_SUPPLY, total_supply)
+    put(CONTINUE_MINTING, b'\x01')
+    put(TOTAL_SUPPLY, 1000000000000)
 
 
 @public